@@ -0,0 +1,37 @@
+# Compares building the CGI dataclasses from a dict and from positional rows.
+#
+#   python benchmarks/cgi_records.py [number]
+
+import sys
+from pathlib import Path
+from timeit import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from vartastorage.cgi_data import EMeterData, InfoData, WrData  # noqa: E402
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for cls in (InfoData, WrData, EMeterData):
+        keys = [item.key for item in cls.CGI_FIELDS]
+        row = list(range(len(keys)))
+
+        as_dict = timeit(
+            "cls.from_dict(dict(zip(keys, row, strict=True)))",
+            globals={"cls": cls, "keys": keys, "row": row},
+            number=number,
+        )
+        as_row = timeit(
+            "cls.from_row(keys, row)",
+            globals={"cls": cls, "keys": keys, "row": row},
+            number=number,
+        )
+        print(
+            f"{cls.__name__:<12} dict {as_dict / number * 1e6:6.2f} us"
+            f"   row {as_row / number * 1e6:6.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
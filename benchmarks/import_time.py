@@ -0,0 +1,61 @@
+# Measures the cold start cost of vartastorage for the different backends.
+# Every scenario runs in a fresh interpreter, the best of several runs is reported.
+#
+#   python benchmarks/import_time.py [runs]
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+SCENARIOS = {
+    "python baseline": "pass",
+    "import vartastorage": "import vartastorage.vartastorage",
+    "modbus only": (
+        "from vartastorage.vartastorage import VartaStorage\n"
+        "VartaStorage('127.0.0.1', cgi=False).modbus_client"
+    ),
+    "cgi only": (
+        "from vartastorage.vartastorage import VartaStorage\n"
+        "VartaStorage('127.0.0.1').cgi_client"
+    ),
+    "modbus and cgi": (
+        "from vartastorage.vartastorage import VartaStorage\n"
+        "v = VartaStorage('127.0.0.1')\n"
+        "v.modbus_client\n"
+        "v.cgi_client"
+    ),
+}
+
+TIMER = (
+    "import time\n"
+    "_start = time.perf_counter()\n"
+    "{code}\n"
+    "print(time.perf_counter() - _start)\n"
+)
+
+
+def measure(code: str, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", TIMER.format(code=code)],
+            capture_output=True,
+            check=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(SRC)},
+        )
+        best = min(best, float(result.stdout))
+    return best
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, code in SCENARIOS.items():
+        print(f"{name:<22} {measure(code, runs) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
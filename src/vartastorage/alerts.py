@@ -0,0 +1,276 @@
+import json
+import logging
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from operator import attrgetter
+from time import time
+from typing import Any
+
+from vartastorage.vartastorage import VartaStorageData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class Alert:
+    device: str
+    rule: str
+    value: Any
+    timestamp: float
+    resolved: bool = False  # the condition of a previously fired alert cleared
+
+
+@dataclass(kw_only=True)
+class Rule(ABC):
+    name: str
+    # dotted path into VartaStorageData, e.g. "ems_data.wr_data.temp_l1"
+    field: str
+    for_seconds: float = 0  # the condition has to hold this long before firing
+    cooldown: float = 0  # minimum seconds between two alerts of a device
+    notify_resolved: bool = True
+
+    def __post_init__(self) -> None:
+        self._getter = attrgetter(self.field)
+
+    def get_value(self, data: VartaStorageData) -> Any:
+        if not data.is_fresh(self.field):
+            # a fallback value of partial mode, not a new reading
+            return None
+        try:
+            return self._getter(data)
+        except AttributeError:
+            # a source in the path was not polled
+            return None
+
+    def new_state(self) -> Any:
+        # per device state of the rule
+        return None
+
+    @abstractmethod
+    def check(self, value: Any, timestamp: float, state: Any) -> bool: ...
+
+
+@dataclass(kw_only=True)
+class Threshold(Rule):
+    above: float | None = None
+    below: float | None = None
+
+    def check(self, value: Any, timestamp: float, state: Any) -> bool:
+        return (self.above is not None and value > self.above) or (
+            self.below is not None and value < self.below
+        )
+
+
+@dataclass(kw_only=True)
+class Equals(Rule):
+    # e.g. Equals(name="error", field="modbus_data.state_text", expected="ERROR")
+    expected: Any
+
+    def check(self, value: Any, timestamp: float, state: Any) -> bool:
+        return value == self.expected
+
+
+@dataclass(kw_only=True)
+class Changed(Rule):
+    # fires whenever the value differs from the previous poll, e.g. error_code
+    def new_state(self) -> Any:
+        return {"value": None}
+
+    def check(self, value: Any, timestamp: float, state: Any) -> bool:
+        previous = state["value"]
+        state["value"] = value
+        return previous is not None and value != previous
+
+
+@dataclass(kw_only=True)
+class RateOfChange(Rule):
+    max_rate: float  # absolute change per second
+
+    def new_state(self) -> Any:
+        return {"value": None, "timestamp": None}
+
+    def check(self, value: Any, timestamp: float, state: Any) -> bool:
+        previous, previous_timestamp = state["value"], state["timestamp"]
+        state["value"], state["timestamp"] = value, timestamp
+        if previous is None or timestamp <= previous_timestamp:
+            return False
+        return abs(value - previous) / (timestamp - previous_timestamp) > self.max_rate
+
+
+@dataclass(kw_only=True)
+class ZScore(Rule):
+    # deviation from the rolling mean of the last window values in standard
+    # deviations, kept as running sums so every update is O(1). The sums are
+    # recomputed every window updates, so rounding errors cannot accumulate.
+    window: int = 60
+    threshold: float = 3.0
+    min_samples: int = 10
+
+    def new_state(self) -> Any:
+        return {"values": deque(), "sum": 0.0, "sum_sq": 0.0, "updates": 0}
+
+    def check(self, value: Any, timestamp: float, state: Any) -> bool:
+        values: deque = state["values"]
+
+        matched = False
+        if len(values) >= self.min_samples:
+            mean = state["sum"] / len(values)
+            variance = max(state["sum_sq"] / len(values) - mean * mean, 0.0)
+            std = math.sqrt(variance)
+            matched = std > 0 and abs(value - mean) / std > self.threshold
+
+        values.append(value)
+        state["sum"] += value
+        state["sum_sq"] += value * value
+        if len(values) > self.window:
+            old = values.popleft()
+            state["sum"] -= old
+            state["sum_sq"] -= old * old
+
+        state["updates"] += 1
+        if state["updates"] >= self.window:
+            state["updates"] = 0
+            state["sum"] = math.fsum(values)
+            state["sum_sq"] = math.fsum(x * x for x in values)
+
+        return matched
+
+
+@dataclass
+class _RuleState:
+    rule_state: Any
+    matched_since: float | None = None
+    firing: bool = False
+    last_alert: float | None = None
+
+
+class AlertEngine:
+    def __init__(
+        self,
+        rules: Iterable[Rule],
+        actions: Iterable[Callable[[Alert], None]] = (),
+    ) -> None:
+        self.rules = list(rules)
+        self.actions = list(actions)
+
+        names = [rule.name for rule in self.rules]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            # the state of a device is keyed by the rule name
+            raise ValueError(f"Duplicate rule names {duplicates}.")
+
+        self._states: dict[tuple[str, str], _RuleState] = {}
+
+    def evaluate(
+        self, device: str, data: VartaStorageData, timestamp: float | None = None
+    ) -> list[Alert]:
+        # feed the next snapshot of a device, returns and dispatches new alerts
+        if timestamp is None:
+            timing = data.timings.get("modbus_data")
+            fresh = timing is not None and data.is_fresh("modbus_data")
+            timestamp = timing.timestamp if fresh else time()
+
+        alerts = []
+        for rule in self.rules:
+            value = rule.get_value(data)
+            if value is None:
+                continue
+
+            state = self._states.get((device, rule.name))
+            if state is None:
+                state = self._states[(device, rule.name)] = _RuleState(rule.new_state())
+
+            try:
+                matched = rule.check(value, timestamp, state.rule_state)
+            except (TypeError, ValueError):
+                # e.g. a numeric rule on a string field, skip it but keep
+                # evaluating the other rules
+                _LOGGER.exception("Rule %s failed for %s", rule.name, device)
+                continue
+            alert = self._debounce(device, rule, state, matched, value, timestamp)
+            if alert is not None:
+                alerts.append(alert)
+
+        for alert in alerts:
+            self._dispatch(alert)
+        return alerts
+
+    def reset(self, device: str | None = None) -> None:
+        # forget the state of one or all devices
+        if device is None:
+            self._states.clear()
+            return
+        for key in [key for key in self._states if key[0] == device]:
+            del self._states[key]
+
+    @staticmethod
+    def _debounce(
+        device: str,
+        rule: Rule,
+        state: _RuleState,
+        matched: bool,
+        value: Any,
+        timestamp: float,
+    ) -> Alert | None:
+        if not matched:
+            state.matched_since = None
+            if not state.firing:
+                return None
+            state.firing = False
+            if not rule.notify_resolved:
+                return None
+            return Alert(device, rule.name, value, timestamp, resolved=True)
+
+        if state.matched_since is None:
+            state.matched_since = timestamp
+        if state.firing or timestamp - state.matched_since < rule.for_seconds:
+            return None
+        if (
+            state.last_alert is not None
+            and timestamp - state.last_alert < rule.cooldown
+        ):
+            return None
+
+        state.firing = True
+        state.last_alert = timestamp
+        return Alert(device, rule.name, value, timestamp)
+
+    def _dispatch(self, alert: Alert) -> None:
+        for action in self.actions:
+            try:
+                action(alert)
+            except Exception:
+                # a broken sink must not stop the others or the poll loop
+                _LOGGER.exception("Alert action %r failed for %s", action, alert)
+
+
+class JsonLinesSink:
+    # appends every alert as one JSON line to a local file
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __call__(self, alert: Alert) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(asdict(alert), default=str) + "\n")
+
+
+class WebhookSink:
+    # posts every alert as JSON, e.g. to a local notification service
+    def __init__(self, url: str, timeout: float = 3) -> None:
+        from requests import Session
+
+        self.url = url
+        self.timeout = timeout
+        self.session = Session()
+
+    def __call__(self, alert: Alert) -> None:
+        response = self.session.post(
+            self.url,
+            data=json.dumps(asdict(alert), default=str),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
@@ -1,12 +1,57 @@
 import ast
 import re
 from dataclasses import dataclass, field
+from threading import Lock
 from typing import Any
 
 from requests import Response, Session
+from requests.adapters import HTTPAdapter, Retry
 
 ERROR_TEMPLATE = "An error occurred while polling {}. Please check your connection"
 
+# sessions shared between CgiClient instances, keyed by host, username and
+# transport, so clients with a different TransportConfig get their own adapter
+_shared_sessions: dict[tuple[str, str | None, "TransportConfig"], Session] = {}
+_shared_sessions_lock = Lock()
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    connect_timeout: float = 3  # seconds
+    read_timeout: float = 3  # seconds
+    pool_connections: int = 1  # number of hosts kept in the pool
+    pool_maxsize: int = 4  # connections kept alive per host
+    keep_alive: bool = True
+    retries: int = 0  # retries on connection errors and 5xx responses
+    backoff_factor: float = 0.5  # sleeps backoff_factor * 2 ** (retry - 1) seconds
+    # share one session (and therefore its connections and login) between all
+    # CgiClient instances using the same host, username and TransportConfig
+    share_session: bool = False
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+    def create_session(self) -> Session:
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+
+        session = Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
 
 @dataclass
 class CgiData:
@@ -17,12 +62,25 @@ class CgiData:
 
 
 class CgiClient:
-    def __init__(self, host, username=None, password=None):
+    def __init__(
+        self,
+        host,
+        username=None,
+        password=None,
+        transport: TransportConfig | None = None,
+        session: Session | None = None,
+    ):
         self.host = host
         self.username = username
         self.password = password
+        self.transport = transport or TransportConfig()
 
-        self.session = Session()
+        if session is not None:
+            self.session = session
+        elif self.transport.share_session:
+            self.session = self._get_shared_session()
+        else:
+            self.session = self.transport.create_session()
 
     def get_all_data_cgi(self) -> CgiData:
         out = CgiData()
@@ -43,6 +101,25 @@ class CgiClient:
         # usually a dict of 'wr': {...}, 'charger': [{...}], 'emeter': {...}, 'na': {}
         result: dict[str, Any] = {}
 
+        for name, (keys, values) in self.get_ems_rows_cgi().items():
+            if len(keys) == len(values):
+                result[name] = dict(zip(keys, values, strict=True))
+            elif len(values) >= 1 and isinstance(values[0], list):
+                # exception for charger values, this is a list of values
+                result[name] = [
+                    dict(zip(keys, row, strict=True))
+                    for row in values
+                    if len(keys) == len(row)
+                ]
+
+        return result
+
+    def get_ems_rows_cgi(self) -> dict[str, tuple[list[str], list]]:
+        # get the column names from ems_conf.js with the positional ems_data.js
+        # values, without building a dict per record
+        # usually 'wr': ([...], [...]), 'charger': ([...], [[...], [...]]), ...
+        result: dict[str, tuple[list[str], list]] = {}
+
         conf = {
             key.lower(): value
             for key, value in self._get_cgi_as_dict("/cgi/ems_conf.js").items()
@@ -54,24 +131,8 @@ class CgiClient:
 
         for conf_key, conf_value in conf.items():
             data_key = conf_key.replace("conf", "data")
-            if data_key not in data:
-                continue
-
-            data_value = data[data_key]
-            if len(conf_value) == len(data_value):
-                result[conf_key.replace("_conf", "")] = {
-                    conf_value[i]: data_value[i] for i in range(0, len(conf_value))
-                }
-            elif len(data_value) >= 1 and isinstance(data_value[0], list):
-                # exception for charger values, this is a list of values
-                data_values: list[dict[str, Any]] = []
-                for element in data_value:
-                    if len(conf_value) != len(element):
-                        continue
-                    data_values.append(
-                        {conf_value[i]: element[i] for i in range(0, len(conf_value))}
-                    )
-                result[conf_key.replace("_conf", "")] = data_values
+            if data_key in data:
+                result[conf_key.replace("_conf", "")] = (conf_value, data[data_key])
 
         return result
 
@@ -108,13 +169,20 @@ class CgiClient:
             if self.password:
                 # Password is set so we check if already logged in
                 self._check_logged_in()
-            return self.session.get(url, timeout=3)
+            return self.session.get(url, timeout=self.transport.timeout)
         except Exception as e:
             raise ValueError(ERROR_TEMPLATE) from e
 
+    def _get_shared_session(self) -> Session:
+        key = (self.host, self.username, self.transport)
+        with _shared_sessions_lock:
+            if key not in _shared_sessions:
+                _shared_sessions[key] = self.transport.create_session()
+            return _shared_sessions[key]
+
     def _check_logged_in(self):
         pass_url = f"http://{self.host}/cgi/login"
-        response = self.session.get(pass_url, timeout=3)
+        response = self.session.get(pass_url, timeout=self.transport.timeout)
         response.raise_for_status()
 
         values = re.compile("userlevel = ([0-9]+)")
@@ -124,6 +192,8 @@ class CgiClient:
             return True
 
         login_data = {"user": self.username, "password": self.password}
-        response = self.session.post(pass_url, login_data, timeout=3)
+        response = self.session.post(
+            pass_url, login_data, timeout=self.transport.timeout
+        )
         response.raise_for_status()
         return response.status_code == 200
@@ -1,8 +1,72 @@
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
+from typing import Any, ClassVar, NamedTuple, Self
+
+
+class CgiField(NamedTuple):
+    key: str  # name of the value in the CGI response
+    field: str  # dataclass field
+    default: Any = None  # used if the key is missing, has to be a literal
+    scale: int | None = None  # the value is divided by scale
+
+
+class CgiRecord:
+    # Base for dataclasses built from CGI values. CGI_FIELDS is compiled once
+    # per class into from_dict, and once per column layout into from_row, so a
+    # poll does not walk the mapping table again.
+    CGI_FIELDS: ClassVar[tuple[CgiField, ...]] = ()
+
+    _from_dict: ClassVar[Callable[[dict], Any]]
+    _from_row: ClassVar[dict[tuple[str, ...], Callable[[Sequence], Any]]]
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._from_dict = _compile(cls)
+        cls._from_row = {}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> Self:
+        return cls._from_dict(values)
+
+    @classmethod
+    def from_row(cls, keys: Sequence[str], row: Sequence) -> Self:
+        # build directly from a positional row of /cgi/ems_data.js, keys are the
+        # column names of the matching /cgi/ems_conf.js entry
+        layout = tuple(keys)
+        constructor = cls._from_row.get(layout)
+        if constructor is None:
+            positions = {key: index for index, key in enumerate(layout)}
+            constructor = cls._from_row[layout] = _compile(cls, positions)
+        return constructor(row)
+
+
+def _compile(
+    cls: type[CgiRecord], positions: dict[str, int] | None = None
+) -> Callable[[Any], Any]:
+    # Generates e.g. "def constructor(row): return cls(soc=row[3] / 10, ...)".
+    # Without positions the values are looked up by key in a dict instead.
+    arg = "values" if positions is None else "row"
+    arguments = []
+    for item in cls.CGI_FIELDS:
+        if positions is None:
+            value = f"values.get({item.key!r}, {item.default!r})"
+        elif item.key in positions:
+            value = f"row[{positions[item.key]}]"
+        else:
+            value = repr(item.default)
+
+        if item.scale is not None:
+            value = f"{value} / {item.scale!r}"
+        arguments.append(f"{item.field}={value}")
+
+    source = f"def constructor({arg}):\n    return cls({', '.join(arguments)})\n"
+    namespace: dict[str, Any] = {"cls": cls}
+    exec(source, namespace)  # noqa: S102
+    return namespace["constructor"]
 
 
 @dataclass
-class InfoData:
+class InfoData(CgiRecord):
     # /cgi/info.js data
     # TODO: Add IP (str), Netmask (str), Gateway (str), DNS (str) if needed.
     #       There are also gridcode (int), capacity_mode (int),
@@ -48,54 +112,52 @@ class InfoData:
     bm_production: list[str]
     lg_battery_serial: list[str]
 
-    @classmethod
-    def from_dict(cls, info: dict) -> "InfoData":
-        return cls(
-            device_description=info.get("Device_Description"),
-            display_serial=info.get("Display_Serial"),
-            sw_id_ems=info.get("SW_ID_EMS"),
-            hw_id_ems=info.get("HW_ID_EMS"),
-            countrycode=info.get("countrycode"),
-            sw_version_ems=info.get("SW_Version_EMS"),
-            anz_charger=info.get("Anz_Charger"),
-            soll_charger=info.get("Soll_Charger"),
-            serial_emeter=info.get("Serial_EMeter"),
-            mac_emeter=info.get("MAC_EMeter"),
-            sw_version_emeter=info.get("SW_Version_EMeter"),
-            bl_version_emeter=info.get("BL_Version_EMeter"),
-            hw_id_emeter=info.get("HW_ID_EMeter"),
-            serial_wr=info.get("Serial_WR"),
-            mac_wr=info.get("MAC_WR"),
-            sw_id_wr=info.get("SW_ID_WR"),
-            hw_id_wr=info.get("HW_ID_WR"),
-            sw_version_wr=info.get("SW_Version_WR"),
-            bl_version_wr=info.get("BL_Version_WR"),
-            serial_ens=info.get("Serial_ENS"),
-            mac_ens=info.get("MAC_ENS"),
-            sw_id_ens=info.get("SW_ID_ENS"),
-            hw_id_ens=info.get("HW_ID_ENS"),
-            sw_version_ens=info.get("SW_Version_ENS"),
-            bl_version_ens=info.get("BL_Version_ENS"),
-            charger_serial=info.get("Charger_Serial", []),
-            charger_mac=info.get("Charger_MAC", []),
-            sw_id_charger=info.get("SW_ID_Charger", []),
-            hw_id_charger=info.get("HW_ID_Charger", []),
-            sw_version_charger=info.get("SW_Version_Charger", []),
-            bl_version_charger=info.get("BL_Version_Charger", []),
-            p_ems_max=info.get("P_EMS_Max"),
-            p_ems_maxdisc=info.get("P_EMS_MaxDisc"),
-            battery_sw=info.get("BatterySW", []),
-            battery_hw=info.get("BatteryHW", []),
-            battery_serial=info.get("BatterySerial", []),
-            bm_update=info.get("BM_Update", []),
-            bm_update_sw=info.get("BM_UpdateSW", []),
-            bm_production=info.get("BM_Production", []),
-            lg_battery_serial=info.get("LG_Battery_Serial", []),
-        )
+    CGI_FIELDS = (
+        CgiField("Device_Description", "device_description"),
+        CgiField("Display_Serial", "display_serial"),
+        CgiField("SW_ID_EMS", "sw_id_ems"),
+        CgiField("HW_ID_EMS", "hw_id_ems"),
+        CgiField("countrycode", "countrycode"),
+        CgiField("SW_Version_EMS", "sw_version_ems"),
+        CgiField("Anz_Charger", "anz_charger"),
+        CgiField("Soll_Charger", "soll_charger"),
+        CgiField("Serial_EMeter", "serial_emeter"),
+        CgiField("MAC_EMeter", "mac_emeter"),
+        CgiField("SW_Version_EMeter", "sw_version_emeter"),
+        CgiField("BL_Version_EMeter", "bl_version_emeter"),
+        CgiField("HW_ID_EMeter", "hw_id_emeter"),
+        CgiField("Serial_WR", "serial_wr"),
+        CgiField("MAC_WR", "mac_wr"),
+        CgiField("SW_ID_WR", "sw_id_wr"),
+        CgiField("HW_ID_WR", "hw_id_wr"),
+        CgiField("SW_Version_WR", "sw_version_wr"),
+        CgiField("BL_Version_WR", "bl_version_wr"),
+        CgiField("Serial_ENS", "serial_ens"),
+        CgiField("MAC_ENS", "mac_ens"),
+        CgiField("SW_ID_ENS", "sw_id_ens"),
+        CgiField("HW_ID_ENS", "hw_id_ens"),
+        CgiField("SW_Version_ENS", "sw_version_ens"),
+        CgiField("BL_Version_ENS", "bl_version_ens"),
+        CgiField("Charger_Serial", "charger_serial", []),
+        CgiField("Charger_MAC", "charger_mac", []),
+        CgiField("SW_ID_Charger", "sw_id_charger", []),
+        CgiField("HW_ID_Charger", "hw_id_charger", []),
+        CgiField("SW_Version_Charger", "sw_version_charger", []),
+        CgiField("BL_Version_Charger", "bl_version_charger", []),
+        CgiField("P_EMS_Max", "p_ems_max"),
+        CgiField("P_EMS_MaxDisc", "p_ems_maxdisc"),
+        CgiField("BatterySW", "battery_sw", []),
+        CgiField("BatteryHW", "battery_hw", []),
+        CgiField("BatterySerial", "battery_serial", []),
+        CgiField("BM_Update", "bm_update", []),
+        CgiField("BM_UpdateSW", "bm_update_sw", []),
+        CgiField("BM_Production", "bm_production", []),
+        CgiField("LG_Battery_Serial", "lg_battery_serial", []),
+    )
 
 
 @dataclass
-class EnergyData:
+class EnergyData(CgiRecord):
     # /cgi/energy.js data
     total_grid_ac_dc: float  # kWh
     total_grid_dc_ac: float  # kWh
@@ -103,35 +165,31 @@ class EnergyData:
     total_inverter_dc_ac: float  # kWh
     total_charge_cycles: list[int]  # list of cycles per charger
 
-    @classmethod
-    def from_dict(cls, energy: dict) -> "EnergyData":
-        return cls(
-            total_grid_ac_dc=energy.get("EGrid_AC_DC", 0) / 1000,
-            total_grid_dc_ac=energy.get("EGrid_DC_AC", 0) / 1000,
-            total_inverter_ac_dc=energy.get("EWr_AC_DC", 0) / 1000,
-            total_inverter_dc_ac=energy.get("EWr_DC_AC", 0) / 1000,
-            total_charge_cycles=energy.get("Chrg_LoadCycles", []),
-        )
+    CGI_FIELDS = (
+        CgiField("EGrid_AC_DC", "total_grid_ac_dc", 0, scale=1000),
+        CgiField("EGrid_DC_AC", "total_grid_dc_ac", 0, scale=1000),
+        CgiField("EWr_AC_DC", "total_inverter_ac_dc", 0, scale=1000),
+        CgiField("EWr_DC_AC", "total_inverter_dc_ac", 0, scale=1000),
+        CgiField("Chrg_LoadCycles", "total_charge_cycles", []),
+    )
 
 
 @dataclass
-class ServiceData:
+class ServiceData(CgiRecord):
     # /cgi/user_serv.js data
     hours_until_filter_maintenance: int | None  # Hours
     status_fan: int | None
     status_main: int | None
 
-    @classmethod
-    def from_dict(cls, service: dict) -> "ServiceData":
-        return cls(
-            hours_until_filter_maintenance=service.get("FilterZeit"),
-            status_fan=service.get("Fan"),
-            status_main=service.get("Main"),
-        )
+    CGI_FIELDS = (
+        CgiField("FilterZeit", "hours_until_filter_maintenance"),
+        CgiField("Fan", "status_fan"),
+        CgiField("Main", "status_main"),
+    )
 
 
 @dataclass
-class WrData:
+class WrData(CgiRecord):
     nominal_power: int | None  # W
     u_verbund_l1: int | None  # V
     u_verbund_l2: int | None  # V
@@ -153,34 +211,32 @@ class WrData:
     online_status: int | None  # 0=Offline, 1=Online
     fan_speed: int | None  # percentage
 
-    @classmethod
-    def from_dict(cls, wr: dict) -> "WrData":
-        return cls(
-            nominal_power=wr.get("PSoll"),
-            u_verbund_l1=wr.get("U Verbund L1"),
-            u_verbund_l2=wr.get("U Verbund L2"),
-            u_verbund_l3=wr.get("U Verbund L3"),
-            i_verbund_l1=wr.get("I Verbund L1"),
-            i_verbund_l2=wr.get("I Verbund L2"),
-            i_verbund_l3=wr.get("I Verbund L3"),
-            u_insel_l1=wr.get("U Insel L1"),
-            u_insel_l2=wr.get("U Insel L2"),
-            u_insel_l3=wr.get("U Insel L3"),
-            i_insel_l1=wr.get("I Insel L1"),
-            i_insel_l2=wr.get("I Insel L2"),
-            i_insel_l3=wr.get("I Insel L3"),
-            temp_l1=wr.get("Temp L1"),
-            temp_l2=wr.get("Temp L2"),
-            temp_l3=wr.get("Temp L3"),
-            temp_board=wr.get("TBoard"),
-            frequency_grid=wr.get("FNetz"),
-            online_status=wr.get("OnlineStatus"),
-            fan_speed=wr.get("Luefter"),
-        )
+    CGI_FIELDS = (
+        CgiField("PSoll", "nominal_power"),
+        CgiField("U Verbund L1", "u_verbund_l1"),
+        CgiField("U Verbund L2", "u_verbund_l2"),
+        CgiField("U Verbund L3", "u_verbund_l3"),
+        CgiField("I Verbund L1", "i_verbund_l1"),
+        CgiField("I Verbund L2", "i_verbund_l2"),
+        CgiField("I Verbund L3", "i_verbund_l3"),
+        CgiField("U Insel L1", "u_insel_l1"),
+        CgiField("U Insel L2", "u_insel_l2"),
+        CgiField("U Insel L3", "u_insel_l3"),
+        CgiField("I Insel L1", "i_insel_l1"),
+        CgiField("I Insel L2", "i_insel_l2"),
+        CgiField("I Insel L3", "i_insel_l3"),
+        CgiField("Temp L1", "temp_l1"),
+        CgiField("Temp L2", "temp_l2"),
+        CgiField("Temp L3", "temp_l3"),
+        CgiField("TBoard", "temp_board"),
+        CgiField("FNetz", "frequency_grid"),
+        CgiField("OnlineStatus", "online_status"),
+        CgiField("Luefter", "fan_speed"),
+    )
 
 
 @dataclass
-class EMeterData:
+class EMeterData(CgiRecord):
     f_netz: int | None
     sens_state: int | None
     u_v_l1: int | None
@@ -205,50 +261,46 @@ class EMeterData:
     is_pv_l2: int | None
     is_pv_l3: int | None
 
-    @classmethod
-    def from_dict(cls, emeter: dict) -> "EMeterData":
-        return cls(
-            f_netz=emeter.get("FNetz"),
-            sens_state=emeter.get("SensState"),
-            u_v_l1=emeter.get("U_V_L1"),
-            u_v_l2=emeter.get("U_V_L2"),
-            u_v_l3=emeter.get("U_V_L3"),
-            iw_v_l1=emeter.get("Iw_V_L1"),
-            iw_v_l2=emeter.get("Iw_V_L2"),
-            iw_v_l3=emeter.get("Iw_V_L3"),
-            ib_v_l1=emeter.get("Ib_V_L1"),
-            ib_v_l2=emeter.get("Ib_V_L2"),
-            ib_v_l3=emeter.get("Ib_V_L3"),
-            is_v_l1=emeter.get("Is_V_L1"),
-            is_v_l2=emeter.get("Is_V_L2"),
-            is_v_l3=emeter.get("Is_V_L3"),
-            iw_pv_l1=emeter.get("Iw_PV_L1"),
-            iw_pv_l2=emeter.get("Iw_PV_L2"),
-            iw_pv_l3=emeter.get("Iw_PV_L3"),
-            ib_pv_l1=emeter.get("Ib_PV_L1"),
-            ib_pv_l2=emeter.get("Ib_PV_L2"),
-            ib_pv_l3=emeter.get("Ib_PV_L3"),
-            is_pv_l1=emeter.get("Is_PV_L1"),
-            is_pv_l2=emeter.get("Is_PV_L2"),
-            is_pv_l3=emeter.get("Is_PV_L3"),
-        )
+    CGI_FIELDS = (
+        CgiField("FNetz", "f_netz"),
+        CgiField("SensState", "sens_state"),
+        CgiField("U_V_L1", "u_v_l1"),
+        CgiField("U_V_L2", "u_v_l2"),
+        CgiField("U_V_L3", "u_v_l3"),
+        CgiField("Iw_V_L1", "iw_v_l1"),
+        CgiField("Iw_V_L2", "iw_v_l2"),
+        CgiField("Iw_V_L3", "iw_v_l3"),
+        CgiField("Ib_V_L1", "ib_v_l1"),
+        CgiField("Ib_V_L2", "ib_v_l2"),
+        CgiField("Ib_V_L3", "ib_v_l3"),
+        CgiField("Is_V_L1", "is_v_l1"),
+        CgiField("Is_V_L2", "is_v_l2"),
+        CgiField("Is_V_L3", "is_v_l3"),
+        CgiField("Iw_PV_L1", "iw_pv_l1"),
+        CgiField("Iw_PV_L2", "iw_pv_l2"),
+        CgiField("Iw_PV_L3", "iw_pv_l3"),
+        CgiField("Ib_PV_L1", "ib_pv_l1"),
+        CgiField("Ib_PV_L2", "ib_pv_l2"),
+        CgiField("Ib_PV_L3", "ib_pv_l3"),
+        CgiField("Is_PV_L1", "is_pv_l1"),
+        CgiField("Is_PV_L2", "is_pv_l2"),
+        CgiField("Is_PV_L3", "is_pv_l3"),
+    )
 
 
 @dataclass
-class EnsData:
+class EnsData(CgiRecord):
     f_netz: int | None
     u_v_l1: int | None
     u_v_l2: int | None
     u_v_l3: int | None
 
-    @classmethod
-    def from_dict(cls, ens: dict) -> "EnsData":
-        return cls(
-            f_netz=ens.get("FNetz"),
-            u_v_l1=ens.get("U_V_L1"),
-            u_v_l2=ens.get("U_V_L2"),
-            u_v_l3=ens.get("U_V_L3"),
-        )
+    CGI_FIELDS = (
+        CgiField("FNetz", "f_netz"),
+        CgiField("U_V_L1", "u_v_l1"),
+        CgiField("U_V_L2", "u_v_l2"),
+        CgiField("U_V_L3", "u_v_l3"),
+    )
 
 
 @dataclass
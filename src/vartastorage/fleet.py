@@ -0,0 +1,192 @@
+import multiprocessing
+import os
+import queue as queue_module
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing.queues import Queue
+from multiprocessing.synchronize import Event
+from time import monotonic, time
+from typing import TYPE_CHECKING
+
+from vartastorage.vartastorage import VartaStorage, VartaStorageData
+
+if TYPE_CHECKING:
+    from vartastorage.cgi_client import TransportConfig
+
+JOIN_TIMEOUT = 5  # seconds to wait for a worker before it gets terminated
+HEALTH_INTERVAL = 1  # seconds between checks for workers which died
+WORKER_ERROR = "The worker process polling this device exited with code {}."
+
+
+@dataclass(frozen=True)
+class DeviceConfig:
+    host: str
+    port: int = 502
+    cgi: bool = True
+    username: str | None = None
+    password: str | None = None
+    cgi_transport: "TransportConfig | None" = None
+
+
+@dataclass
+class FleetResult:
+    host: str
+    port: int
+    timestamp: float  # wall clock time when the poll finished
+    data: VartaStorageData | None = None
+    error: str | None = None
+
+
+def poll_fleet(
+    devices: Sequence[DeviceConfig],
+    interval: float | None = None,
+    processes: int | None = None,
+    threads: int = 16,
+    batch_size: int = 64,
+) -> Iterator[FleetResult]:
+    # poll all devices once (interval=None) or endlessly every interval seconds.
+    # The devices are sharded round robin over worker processes and every worker
+    # polls its shard concurrently with a thread pool. Results are streamed back
+    # in batches over a pipe while they arrive.
+    if not devices:
+        return
+
+    processes = max(1, min(processes or os.cpu_count() or 1, len(devices)))
+    queue: Queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+
+    shards = [devices[i::processes] for i in range(processes)]
+    workers = [
+        _start_worker(i, shards[i], interval, threads, batch_size, queue, stop)
+        for i in range(processes)
+    ]
+
+    running = set(range(processes))
+    probed: set[int] = set()
+    next_check = monotonic() + HEALTH_INTERVAL
+    try:
+        while running:
+            if monotonic() >= next_check:
+                next_check = monotonic() + HEALTH_INTERVAL
+                # a worker killed e.g. by the OOM killer never sends its index.
+                # Everything an exited worker sent is already in the queue, so
+                # if a probe put behind it arrives first, the worker is dead.
+                for index in running - probed:
+                    if workers[index].exitcode is not None:
+                        probed.add(index)
+                        queue.put((index,))
+
+            try:
+                message = queue.get(timeout=HEALTH_INTERVAL)
+            except queue_module.Empty:
+                continue
+
+            if isinstance(message, int):
+                # worker finished its shard
+                running.discard(message)
+            elif isinstance(message, tuple):
+                index = message[0]
+                probed.discard(index)
+                if index not in running:
+                    continue
+                # report the shard as failed and, unless this is a single
+                # poll, keep polling it with a new worker
+                exitcode = workers[index].exitcode
+                for device in shards[index]:
+                    yield FleetResult(
+                        device.host,
+                        device.port,
+                        time(),
+                        error=WORKER_ERROR.format(exitcode),
+                    )
+                if interval is None:
+                    running.discard(index)
+                else:
+                    workers[index] = _start_worker(
+                        index, shards[index], interval, threads, batch_size, queue, stop
+                    )
+            else:
+                yield from message
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(JOIN_TIMEOUT)
+            if worker.is_alive():
+                worker.terminate()
+        queue.close()
+
+
+def _start_worker(
+    index: int,
+    shard: Sequence[DeviceConfig],
+    interval: float | None,
+    threads: int,
+    batch_size: int,
+    queue: Queue,
+    stop: Event,
+) -> multiprocessing.Process:
+    worker = multiprocessing.Process(
+        target=_poll_shard,
+        args=(index, shard, interval, threads, batch_size, queue, stop),
+        daemon=True,
+    )
+    worker.start()
+    return worker
+
+
+def _poll_shard(
+    index: int,
+    shard: Sequence[DeviceConfig],
+    interval: float | None,
+    threads: int,
+    batch_size: int,
+    queue: Queue,
+    stop: Event,
+) -> None:
+    clients = [
+        (
+            device,
+            VartaStorage(
+                device.host,
+                device.port,
+                cgi=device.cgi,
+                username=device.username,
+                password=device.password,
+                cgi_transport=device.cgi_transport,
+            ),
+        )
+        for device in shard
+    ]
+
+    with ThreadPoolExecutor(max_workers=min(threads, len(clients))) as pool:
+        while not stop.is_set():
+            started = monotonic()
+            futures = [
+                pool.submit(_poll_device, device, varta) for device, varta in clients
+            ]
+
+            batch: list[FleetResult] = []
+            for future in as_completed(futures):
+                batch.append(future.result())
+                if len(batch) >= batch_size:
+                    queue.put(batch)
+                    batch = []
+            if batch:
+                queue.put(batch)
+
+            if interval is None:
+                break
+            stop.wait(max(interval - (monotonic() - started), 0))
+
+    # tell the parent which worker is done. A worker which crashed does not,
+    # the parent notices its exit and handles its shard.
+    queue.put(index)
+
+
+def _poll_device(device: DeviceConfig, varta: VartaStorage) -> FleetResult:
+    try:
+        data = varta.get_all_data()
+    except Exception as e:
+        return FleetResult(device.host, device.port, time(), error=str(e))
+    return FleetResult(device.host, device.port, time(), data=data)
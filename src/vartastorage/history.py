@@ -0,0 +1,183 @@
+import sqlite3
+from collections.abc import Iterator
+from dataclasses import dataclass, fields, is_dataclass
+from time import monotonic, time
+from typing import Any
+
+from vartastorage.vartastorage import VartaStorageData
+
+# rollup tables maintained on insert, resolution name: bucket size in seconds.
+# Buckets are aligned to the unix epoch, so day buckets are UTC days.
+ROLLUPS = {"minute": 60, "hour": 3600, "day": 86400}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    device TEXT NOT NULL,
+    field TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_device_field_ts ON samples (device, field, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution TEXT NOT NULL,
+    device TEXT NOT NULL,
+    field TEXT NOT NULL,
+    bucket REAL NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (resolution, device, field, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (resolution, device, field, bucket, count, sum, min, max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolution, device, field, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = min(min, excluded.min),
+    max = max(max, excluded.max)
+"""
+
+
+@dataclass
+class Rollup:
+    bucket: float  # unix timestamp of the bucket start
+    count: int
+    sum: float
+    min: float
+    max: float
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count
+
+
+class HistoryStore:
+    def __init__(
+        self, path: str, batch_size: int = 500, flush_interval: float = 60
+    ) -> None:
+        # samples are buffered and written in one transaction once batch_size
+        # samples are pending or flush_interval seconds passed since the last write
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+        self._pending: list[tuple[str, str, float, float]] = []
+        self._last_flush = monotonic()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add(
+        self, device: str, data: VartaStorageData, timestamp: float | None = None
+    ) -> None:
+        # store all numeric fields of a snapshot, e.g. "modbus_data.soc".
+        # Values served from the last known good data in partial mode were
+        # already stored when they were read, so they are skipped.
+        if timestamp is None:
+            timing = data.timings.get("modbus_data")
+            fresh = timing is not None and data.is_fresh("modbus_data")
+            timestamp = timing.timestamp if fresh else time()
+
+        self._pending.extend(
+            (device, name, timestamp, value)
+            for name, value in _flatten(data)
+            if data.is_fresh(name)
+        )
+
+        if (
+            len(self._pending) >= self.batch_size
+            or monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = monotonic()
+        if not self._pending:
+            return
+
+        # aggregate the batch first, so every bucket is upserted only once
+        rollups: dict[tuple[str, str, str, float], list[float]] = {}
+        for device, name, timestamp, value in self._pending:
+            for resolution, size in ROLLUPS.items():
+                key = (resolution, device, name, timestamp - timestamp % size)
+                if key not in rollups:
+                    rollups[key] = [1, value, value, value]
+                    continue
+                rollup = rollups[key]
+                rollup[0] += 1
+                rollup[1] += value
+                rollup[2] = min(rollup[2], value)
+                rollup[3] = max(rollup[3], value)
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO samples (device, field, ts, value) VALUES (?, ?, ?, ?)",
+                self._pending,
+            )
+            self._connection.executemany(
+                UPSERT_ROLLUP,
+                ((*key, *values) for key, values in rollups.items()),
+            )
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def query(
+        self, device: str, field: str, start: float, end: float
+    ) -> list[tuple[float, float]]:
+        # raw samples as (timestamp, value) with start <= timestamp < end
+        cursor = self._connection.execute(
+            "SELECT ts, value FROM samples "
+            "WHERE device = ? AND field = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (device, field, start, end),
+        )
+        return cursor.fetchall()
+
+    def query_rollups(
+        self, device: str, field: str, start: float, end: float, resolution: str
+    ) -> list[Rollup]:
+        # precomputed buckets with start <= bucket < end
+        if resolution not in ROLLUPS:
+            raise ValueError(f"Unknown resolution {resolution}, use one of {ROLLUPS}.")
+
+        cursor = self._connection.execute(
+            "SELECT bucket, count, sum, min, max FROM rollups "
+            "WHERE resolution = ? AND device = ? AND field = ? "
+            "AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (resolution, device, field, start, end),
+        )
+        return [Rollup(*row) for row in cursor.fetchall()]
+
+    def get_fields(self, device: str) -> list[str]:
+        # every field is part of the day rollups, which is the smallest table
+        cursor = self._connection.execute(
+            "SELECT DISTINCT field FROM rollups WHERE resolution = ? AND device = ?",
+            ("day", device),
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _flatten(data: Any, prefix: str = "") -> Iterator[tuple[str, float]]:
+    # numeric leaves of the data sources, strings, lists and None are skipped,
+    # so is poll metadata like poll_latency at the top level
+    for data_field in fields(data):
+        value = getattr(data, data_field.name)
+        name = prefix + data_field.name
+        if is_dataclass(value):
+            yield from _flatten(value, name + ".")
+        elif prefix and isinstance(value, int | float):
+            yield (name, float(value))
@@ -1,16 +1,33 @@
-from dataclasses import dataclass
+from array import array
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass, field, fields
 from time import time
 
-from pymodbus.client.tcp import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
-
 ERROR_TEMPLATE = (
     "An error occurred while polling address {}. "
     + "This might be an issue with your device."
 )
+CONNECTION_ERROR = "Could not connect to the modbus server at {}:{}."
+NO_DATA_ERROR = "No register could be read. This might be an issue with your device."
 
 CACHE_TIME = 900  # 15 minutes
 
+MAX_BLOCK_SIZE = 125  # maximum number of registers in one modbus read request
+REGISTER_COUNT = 65536  # modbus register addresses are 16 bit
+
+# modbus exception codes of a block that reaches into unsupported registers
+ILLEGAL_DATA_ADDRESS = 2
+ILLEGAL_DATA_VALUE = 3
+SCAN_SPLIT_CODES = (ILLEGAL_DATA_ADDRESS, ILLEGAL_DATA_VALUE)
+# some devices answer unsupported registers with a device failure, but it can
+# also be a real failure, so splitting on it has to be enabled explicitly
+DEVICE_FAILURE = 4
+
+
+class ModbusConnectionError(ValueError):
+    # the device is not reachable at all, unlike an error response of a register
+    pass
+
 
 @dataclass
 class RawData:
@@ -30,6 +47,64 @@ class RawData:
     software_version_inverter: str
 
 
+@dataclass
+class RegisterImage:
+    # dense image of a holding register range, unreadable registers are invalid
+    start: int
+    registers: array = field(default_factory=lambda: array("H"))
+    valid: bytearray = field(default_factory=bytearray)
+    timestamp: float = field(default_factory=time)
+
+    @classmethod
+    def empty(cls, start: int, count: int) -> "RegisterImage":
+        return cls(start, array("H", bytes(2 * count)), bytearray(count))
+
+    def __len__(self) -> int:
+        return len(self.registers)
+
+    def __contains__(self, address: int) -> bool:
+        index = address - self.start
+        return 0 <= index < len(self.registers) and self.valid[index] == 1
+
+    def get(self, address: int) -> int | None:
+        if address not in self:
+            return None
+        return self.registers[address - self.start]
+
+    def set_block(self, address: int, registers: list[int]) -> None:
+        index = address - self.start
+        self.registers[index : index + len(registers)] = array("H", registers)
+        self.valid[index : index + len(registers)] = b"\x01" * len(registers)
+
+    def items(self) -> Iterator[tuple[int, int]]:
+        # valid (address, value) pairs
+        for index, value in enumerate(self.registers):
+            if self.valid[index]:
+                yield (self.start + index, value)
+
+    def diff(
+        self, previous: "RegisterImage"
+    ) -> dict[int, tuple[int | None, int | None]]:
+        # changed registers as address: (previous value, current value)
+        # registers which became (un)readable are reported with None
+        if (
+            previous.start == self.start
+            and previous.valid == self.valid
+            and previous.registers == self.registers
+        ):
+            return {}
+
+        out: dict[int, tuple[int | None, int | None]] = {}
+        first = min(self.start, previous.start)
+        last = max(self.start + len(self), previous.start + len(previous))
+        for address in range(first, last):
+            old = previous.get(address)
+            new = self.get(address)
+            if old != new:
+                out[address] = (old, new)
+        return out
+
+
 @dataclass
 class CacheData:
     timestamp_cache: int = 0
@@ -59,6 +134,12 @@ class ModbusClient:
     def __init__(self, modbus_host: str, modbus_port: int) -> None:
         self.modbus_host = modbus_host
         self.modbus_port = modbus_port
+
+        # pymodbus is expensive to import, so defer it until a client is created
+        from pymodbus.client.tcp import ModbusTcpClient
+        from pymodbus.exceptions import ModbusException
+
+        self._modbus_exception = ModbusException
         self._modbus_client = ModbusTcpClient(
             host=self.modbus_host, port=self.modbus_port
         )
@@ -77,23 +158,56 @@ class ModbusClient:
     def get_all_data_modbus(self) -> RawData:
         self.update_cache()
         out = RawData(
-            soc=self.get_soc(),
-            grid_power=self.get_grid_power(),
-            state=self.get_state(),
-            active_power=self.get_active_power(),
-            apparent_power=self.get_apparent_power(),
-            error_code=self.get_error_code(),
-            number_modules=self.get_bm_installed(),
-            installed_capacity=self.get_installed_capacity(),
-            total_charged_energy=self.get_total_charged_energy(),
-            serial=self._cache.serial,
-            table_version=self._cache.table_version,
-            software_version_ems=self._cache.software_version_ems,
-            software_version_ens=self._cache.software_version_ens,
-            software_version_inverter=self._cache.software_version_inverter,
+            **{name: getter() for name, getter in self._get_field_readers().items()},
+            **self._get_cached_fields(),
         )
         return out
 
+    def get_all_data_modbus_partial(
+        self, fallback: RawData | None = None, retries: int = 0
+    ) -> tuple[RawData, list[str]]:
+        # like get_all_data_modbus, but a register answering with an error is
+        # retried on its own and then taken from fallback. Returns the data and
+        # the failed fields. Without a fallback failed fields are None, if no
+        # field could be read at all it raises. Connection errors raise right
+        # away instead of connecting once per register.
+        failed: list[str] = []
+        values: dict[str, int | str | None] = {}
+
+        try:
+            self.update_cache()
+            values.update(self._get_cached_fields())
+        except ModbusConnectionError:
+            raise
+        except ValueError:
+            if self._cache.timestamp_cache == 0:
+                # the cache has never been filled
+                failed.extend(self._get_cached_fields())
+            else:
+                # an outdated cache is still good enough
+                values.update(self._get_cached_fields())
+
+        for name, getter in self._get_field_readers().items():
+            for _ in range(retries + 1):
+                try:
+                    values[name] = getter()
+                    break
+                except ModbusConnectionError:
+                    raise
+                except ValueError:
+                    continue
+            else:
+                failed.append(name)
+
+        if fallback is None and len(failed) == len(fields(RawData)):
+            raise ValueError(NO_DATA_ERROR)
+
+        fallback_values = asdict(fallback) if fallback is not None else {}
+        for name in failed:
+            values[name] = fallback_values.get(name)
+
+        return (RawData(**values), failed)
+
     def update_cache(self) -> None:
         if int(time()) - self._cache.timestamp_cache < CACHE_TIME:
             # cache is still relevant
@@ -107,34 +221,58 @@ class ModbusClient:
             software_version_inverter=self.get_software_version_inverter(),
         )
 
+    def _get_field_readers(self) -> dict[str, Callable[[], int]]:
+        # RawData fields which are polled every time
+        return {
+            "soc": self.get_soc,
+            "grid_power": self.get_grid_power,
+            "state": self.get_state,
+            "active_power": self.get_active_power,
+            "apparent_power": self.get_apparent_power,
+            "error_code": self.get_error_code,
+            "number_modules": self.get_bm_installed,
+            "installed_capacity": self.get_installed_capacity,
+            "total_charged_energy": self.get_total_charged_energy,
+        }
+
+    def _get_cached_fields(self) -> dict[str, int | str]:
+        # RawData fields which are served from the cache
+        return {
+            "serial": self._cache.serial,
+            "table_version": self._cache.table_version,
+            "software_version_ems": self._cache.software_version_ems,
+            "software_version_ens": self._cache.software_version_ens,
+            "software_version_inverter": self._cache.software_version_inverter,
+        }
+
     def get_software_version_ems(self) -> str:
         registers = self._get_value_modbus(1000, 17)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.STRING, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.STRING, word_order="big"
         )
         # Decode using UTF-16 little-endian
         return self._clean_string(result)
 
     def get_software_version_ens(self) -> str:
         registers = self._get_value_modbus(1017, 17)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.STRING, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.STRING, word_order="big"
         )
         # Decode using UTF-16 little-endian
         return self._clean_string(result)
 
     def get_software_version_inverter(self) -> str:
         registers = self._get_value_modbus(1034, 17)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.STRING, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.STRING, word_order="big"
         )
         # Decode using UTF-16 little-endian
         return self._clean_string(result)
 
     def get_table_version(self) -> int:
         registers = self._get_value_modbus(1051, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -143,8 +281,8 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1054, 10)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.STRING, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.STRING, word_order="big"
         )
         # Extract only the ASCII-readable characters (digits in this case)
         return self._clean_string(result)
@@ -154,8 +292,8 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1064, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -167,8 +305,8 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1065, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -178,8 +316,8 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1066, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.INT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.INT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -189,8 +327,8 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1067, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.INT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.INT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -199,8 +337,8 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1068, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -211,11 +349,11 @@ class ModbusClient:
         reg_low = self._get_value_modbus(1069, 1)
         reg_high = self._get_value_modbus(1070, 1)
 
-        res_low = ModbusTcpClient.convert_from_registers(
-            reg_low, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        res_low = self._modbus_client.convert_from_registers(
+            reg_low, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
-        res_high = ModbusTcpClient.convert_from_registers(
-            reg_high, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        res_high = self._modbus_client.convert_from_registers(
+            reg_high, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
 
         res_low_int = self._convert_value_to_int(res_low)
@@ -229,16 +367,16 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1071, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
         # Installed capacity has to be multiplied by 10
         return self._convert_value_to_int(result) * 10
 
     def get_error_code(self) -> int:
         registers = self._get_value_modbus(1072, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.UINT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.UINT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
@@ -247,27 +385,75 @@ class ModbusClient:
         # Supported on VARTA element, pulse, pulse neo, link and flex storage devices
 
         registers = self._get_value_modbus(1078, 1)
-        result = ModbusTcpClient.convert_from_registers(
-            registers, data_type=ModbusTcpClient.DATATYPE.INT16, word_order="big"
+        result = self._modbus_client.convert_from_registers(
+            registers, data_type=self._modbus_client.DATATYPE.INT16, word_order="big"
         )
         return self._convert_value_to_int(result)
 
-    def _get_value_modbus(self, address, count) -> list:
-        if not self._modbus_client.is_socket_open():
-            self._modbus_client.connect()
-
-        try:
-            rr = self._modbus_client.read_holding_registers(
-                address=address, count=count
+    def scan_registers(
+        self,
+        start: int,
+        count: int,
+        block_size: int = MAX_BLOCK_SIZE,
+        split_on_device_failure: bool = False,
+    ) -> RegisterImage:
+        # read an arbitrary register range in as few requests as possible.
+        # Blocks rejected with an illegal address are split in halves until the
+        # unsupported registers are isolated, these stay invalid in the image.
+        # Any other error (by default including a device failure) raises.
+        if not 0 < block_size <= MAX_BLOCK_SIZE:
+            raise ValueError(f"block_size has to be between 1 and {MAX_BLOCK_SIZE}.")
+        if start < 0 or count < 0 or start + count > REGISTER_COUNT:
+            raise ValueError(
+                f"Expected 0 <= start and 0 <= count with start + count <= "
+                f"{REGISTER_COUNT}."
             )
-        except ModbusException as exc:
-            raise ValueError(ERROR_TEMPLATE.format(address)) from exc
 
+        split_codes = SCAN_SPLIT_CODES
+        if split_on_device_failure:
+            split_codes += (DEVICE_FAILURE,)
+
+        image = RegisterImage.empty(start, count)
+        pending = [
+            (address, min(block_size, start + count - address))
+            for address in range(start, start + count, block_size)
+        ]
+        while pending:
+            address, size = pending.pop()
+            rr = self._read_holding_registers(address, size)
+            if not rr.isError():
+                image.set_block(address, rr.registers)
+            elif getattr(rr, "exception_code", None) not in split_codes:
+                raise ValueError(ERROR_TEMPLATE.format(address))
+            elif size > 1:
+                half = size // 2
+                pending.append((address + half, size - half))
+                pending.append((address, half))
+
+        return image
+
+    def _get_value_modbus(self, address, count) -> list:
+        rr = self._read_holding_registers(address, count)
         if rr.isError():
             raise ValueError(ERROR_TEMPLATE.format(address))
 
         return rr.registers
 
+    def _read_holding_registers(self, address, count):
+        if not self._modbus_client.is_socket_open() and not self.connect():
+            raise ModbusConnectionError(
+                CONNECTION_ERROR.format(self.modbus_host, self.modbus_port)
+            )
+
+        try:
+            return self._modbus_client.read_holding_registers(
+                address=address, count=count
+            )
+        except self._modbus_exception as exc:
+            # raised by pymodbus for a lost connection or a missing response,
+            # error responses of the device are returned instead
+            raise ModbusConnectionError(ERROR_TEMPLATE.format(address)) from exc
+
     @staticmethod
     def _clean_string(input_bytes) -> str:
         # I know this is super wierd. But i have no idea whats here going on in the
@@ -281,4 +467,4 @@ class ModbusClient:
         if isinstance(value, list):
             # if value is a list, return the first element or 0 if the list is empty
             return int(value[0]) if value else 0
-        return int(value)
\ No newline at end of file
+        return int(value)
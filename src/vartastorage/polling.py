@@ -0,0 +1,126 @@
+import logging
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from time import localtime, monotonic, sleep
+
+from vartastorage.vartastorage import ModbusData, VartaStorage, VartaStorageData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class PollingConfig:
+    min_interval: float = 5.0  # seconds
+    max_interval: float = 300.0  # seconds
+    # every idle poll stretches the interval by this factor up to max_interval
+    backoff_factor: float = 2.0
+    # grid power change in W/s that switches back to min_interval
+    grid_power_rate: float = 50.0
+    # grid power change in W since the last poll that switches back to
+    # min_interval. Unlike the rate this still triggers after a long back off.
+    grid_power_delta: int = 500
+    # local (start, end) hours, e.g. (22, 6), in which idle polls jump straight
+    # to max_interval instead of backing off step by step. None disables it.
+    night_hours: tuple[int, int] | None = None
+    # states (see VartaStorage._interpret_state) that are always polled fast
+    active_states: tuple[str, ...] = ("BUSY", "CHARGE", "DISCHARGE", "ERROR")
+
+    def __post_init__(self) -> None:
+        if self.min_interval <= 0 or self.max_interval < self.min_interval:
+            raise ValueError("Expected 0 < min_interval <= max_interval.")
+        if self.backoff_factor < 1:
+            raise ValueError("The backoff_factor has to be at least 1.")
+
+
+class AdaptiveScheduler:
+    def __init__(self, config: PollingConfig | None = None) -> None:
+        self.config = config or PollingConfig()
+        self.interval = self.config.min_interval
+
+        self._last_grid_power: int | None = None
+        self._last_timestamp: float | None = None
+
+    def reset(self) -> None:
+        self.interval = self.config.min_interval
+        self._last_grid_power = None
+        self._last_timestamp = None
+
+    def update(self, modbus_data: ModbusData, timestamp: float | None = None) -> float:
+        # feed the latest modbus snapshot and get the seconds until the next poll
+        if timestamp is None:
+            timestamp = monotonic()
+
+        if self._is_active(modbus_data, timestamp):
+            self.interval = self.config.min_interval
+        else:
+            self.back_off()
+
+        if modbus_data.grid_power is not None:
+            self._last_grid_power = modbus_data.grid_power
+            self._last_timestamp = timestamp
+        return self.interval
+
+    def back_off(self) -> float:
+        # stretch the interval like an idle poll, e.g. after a failed poll
+        if self._is_night():
+            self.interval = self.config.max_interval
+        else:
+            self.interval = min(
+                self.interval * self.config.backoff_factor, self.config.max_interval
+            )
+        return self.interval
+
+    def _is_active(self, modbus_data: ModbusData, timestamp: float) -> bool:
+        if modbus_data.state_text in self.config.active_states:
+            return True
+
+        if (
+            modbus_data.grid_power is None
+            or self._last_grid_power is None
+            or self._last_timestamp is None
+        ):
+            # grid_power is None if it was never read in partial mode
+            return False
+
+        delta = abs(modbus_data.grid_power - self._last_grid_power)
+        if delta >= self.config.grid_power_delta:
+            return True
+
+        elapsed = max(timestamp - self._last_timestamp, 1e-3)
+        return delta / elapsed >= self.config.grid_power_rate
+
+    def _is_night(self) -> bool:
+        if self.config.night_hours is None:
+            return False
+
+        start, end = self.config.night_hours
+        hour = localtime().tm_hour
+        if start <= end:
+            return start <= hour < end
+        # the night spans midnight
+        return hour >= start or hour < end
+
+
+def poll_adaptive(
+    varta: VartaStorage,
+    config: PollingConfig | None = None,
+    modbus_only: bool = False,
+    sleep_func: Callable[[float], None] = sleep,
+) -> Iterator[VartaStorageData]:
+    # endless generator polling the device with an interval driven by its state.
+    # A failed poll is logged and the interval backs off, the generator goes on.
+    scheduler = AdaptiveScheduler(config)
+
+    while True:
+        started = monotonic()
+        try:
+            data = varta.get_all_data(modbus_only=modbus_only)
+        except ValueError:
+            _LOGGER.exception("Polling %s failed", varta.modbus_host)
+            sleep_func(max(scheduler.back_off() - (monotonic() - started), 0))
+            continue
+
+        interval = scheduler.update(data.modbus_data, started)
+        yield data
+
+        sleep_func(max(interval - (monotonic() - started), 0))
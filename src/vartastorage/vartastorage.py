@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+import math
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any
 
-from vartastorage.cgi_client import CgiClient
 from vartastorage.cgi_data import (
     BattData,
     ChargerData,
@@ -13,8 +16,13 @@ from vartastorage.cgi_data import (
 )
 from vartastorage.modbus_client import ModbusClient, RawData
 
+if TYPE_CHECKING:
+    from vartastorage.cgi_client import CgiClient, TransportConfig
+
 CGI_ERR = "The CgiClient is not initialized. Did you set cgi=False?"
 
+MAX_SKEW_RETRIES = 2  # re-read rounds for sources exceeding max_skew
+
 
 @dataclass
 class ModbusData(RawData):
@@ -45,6 +53,14 @@ class ModbusData(RawData):
         )
 
 
+# ModbusData interpretations computed from a RawData field
+DERIVED_FIELDS = {
+    "state": ("state_text",),
+    "grid_power": ("to_grid_power", "from_grid_power"),
+    "active_power": ("charge_power", "discharge_power"),
+}
+
+
 @dataclass
 class EmsData:
     # /cgi/ems_datajs data
@@ -55,6 +71,30 @@ class EmsData:
     batt_data: BattData | None = None
 
 
+@dataclass
+class SourceTiming:
+    # acquisition time of one source, taken at the middle of its request(s)
+    monotonic: float  # time.monotonic()
+    timestamp: float  # time.time()
+    duration: float  # seconds the source took to read
+
+
+@dataclass
+class SourceStatus:
+    # only filled in partial mode, see VartaStorage(partial=True)
+    error: str | None = None  # why the source could not be read
+    # seconds since the returned value was read, None if there is no value at all
+    age: float | None = 0.0
+    # modbus fields taken from the last known good data, mapped to their age.
+    # Fields which were never read are None with an age of math.inf, so are
+    # their interpretations (see DERIVED_FIELDS).
+    failed_fields: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.failed_fields
+
+
 @dataclass
 class VartaStorageData:
     modbus_data: ModbusData
@@ -62,6 +102,36 @@ class VartaStorageData:
     service_data: ServiceData | None = None
     ems_data: EmsData | None = None
     energy_data: EnergyData | None = None
+    # keyed by the name of the data field, e.g. "modbus_data"
+    timings: dict[str, SourceTiming] = field(default_factory=dict)
+    status: dict[str, SourceStatus] = field(default_factory=dict)
+    poll_latency: float = 0.0  # seconds the whole poll took
+
+    @property
+    def ok(self) -> bool:
+        return all(status.ok for status in self.status.values())
+
+    def is_fresh(self, path: str) -> bool:
+        # False for a dotted path, e.g. "modbus_data.soc", which was not read
+        # by this poll but taken from the last known good data in partial mode
+        source, _, name = path.partition(".")
+        status = self.status.get(source)
+        if status is None:
+            return True
+        if status.error is not None:
+            return False
+        return not any(
+            name == failed or name in DERIVED_FIELDS.get(failed, ())
+            for failed in status.failed_fields
+        )
+
+    @property
+    def skew(self) -> float:
+        # seconds between the oldest and newest source
+        if not self.timings:
+            return 0.0
+        values = [timing.monotonic for timing in self.timings.values()]
+        return max(values) - min(values)
 
 
 class VartaStorage:
@@ -72,38 +142,112 @@ class VartaStorage:
         cgi: bool = True,
         username: str | None = None,
         password: str | None = None,
+        cgi_transport: "TransportConfig | None" = None,
+        max_skew: float | None = None,
+        partial: bool = False,
+        retries: int = 1,
     ):
+        self.modbus_host = modbus_host
+        self.modbus_port = modbus_port
+        self.cgi = cgi
+        self.username = username
+        self.password = password
+        self.cgi_transport = cgi_transport
+        # sources read more than max_skew seconds before the newest one are read
+        # again (up to MAX_SKEW_RETRIES times), None accepts any skew. The sources
+        # are read one after another, so the skew cannot get below the sum of the
+        # read durations in between. Re-reads are skipped if max_skew is below that.
+        self.max_skew = max_skew
+        # in partial mode failing sources (or single modbus registers) are read
+        # again up to retries times and then served from the last known good data
+        self.partial = partial
+        self.retries = retries
+
+        # both backends are created on first use, so a modbus-only or cgi-only
+        # caller never pays for importing the library of the other one
+        self._modbus_client: ModbusClient | None = None
+        self._cgi_client: CgiClient | None = None
+
+        # last known good data for the partial mode
+        self._last_good: dict[str, tuple[Any, SourceTiming]] = {}
+        self._field_timestamps: dict[str, float] = {}
+        self._failed_fields: list[str] = []
+
+    @property
+    def modbus_client(self) -> ModbusClient:
         # connect to modbus server
-        self.modbus_client = ModbusClient(modbus_host, modbus_port)
+        if self._modbus_client is None:
+            self._modbus_client = ModbusClient(self.modbus_host, self.modbus_port)
+        return self._modbus_client
 
+    @property
+    def cgi_client(self) -> "CgiClient | None":
         # connect to cgi
-        if cgi:
-            self.cgi_client = CgiClient(modbus_host, username, password)
-
-    def get_all_data(self) -> VartaStorageData:
-        out = VartaStorageData(modbus_data=self.get_all_data_modbus())
-
-        if self.cgi_client is not None:
-            out.ems_data = self.get_ems_cgi()
-            out.energy_data = self.get_energy_cgi()
-            out.info_data = self.get_info_cgi()
-            out.service_data = self.get_service_cgi()
-
-        return out
+        if self._cgi_client is None and self.cgi:
+            from vartastorage.cgi_client import CgiClient
+
+            self._cgi_client = CgiClient(
+                self.modbus_host, self.username, self.password, self.cgi_transport
+            )
+        return self._cgi_client
+
+    def get_all_data(self, modbus_only: bool = False) -> VartaStorageData:
+        # modbus_only skips the cgi sources, e.g. for fast polls
+        started = monotonic()
+
+        readers: dict[str, Callable[[], Any]] = {
+            "modbus_data": self._get_all_data_modbus_partial
+            if self.partial
+            else self.get_all_data_modbus
+        }
+        if not modbus_only and self.cgi_client is not None:
+            readers["ems_data"] = self.get_ems_cgi
+            readers["energy_data"] = self.get_energy_cgi
+            readers["info_data"] = self.get_info_cgi
+            readers["service_data"] = self.get_service_cgi
+
+        values: dict[str, Any] = {}
+        timings: dict[str, SourceTiming | None] = {}
+        status: dict[str, SourceStatus] = {}
+        for name, reader in readers.items():
+            values[name], timings[name], status[name] = self._read_source(name, reader)
+
+        for _ in range(MAX_SKEW_RETRIES):
+            # sources which failed are not read again because of skew
+            stale = [
+                name
+                for name in self._get_stale_sources(timings)
+                if status[name].error is None
+            ]
+            if not stale:
+                break
+
+            skew = self._get_skew(timings)
+            for name in stale:
+                values[name], timings[name], status[name] = self._read_source(
+                    name, readers[name]
+                )
+            if self._get_skew(timings) >= skew:
+                # the re-read made other sources stale, another round won't help
+                break
+
+        if self.partial and status["modbus_data"].error is None:
+            now = monotonic()
+            status["modbus_data"].failed_fields = {
+                name: now - self._field_timestamps.get(name, -math.inf)
+                for name in self._failed_fields
+            }
+
+        return VartaStorageData(
+            **values,
+            timings={k: v for k, v in timings.items() if v is not None},
+            status=status,
+            poll_latency=monotonic() - started,
+        )
 
     def get_all_data_modbus(self) -> ModbusData:
         res = self.modbus_client.get_all_data_modbus()
-
-        calc_grid_power = self._calculate_to_from_grid(res.grid_power)
-        calc_charge_power = self._calculate_charge_discharge(res.active_power)
-
-        base_data = ModbusData.from_modbus_data(res)
-        base_data.state_text = self._interpret_state(state=res.state)
-        base_data.to_grid_power = calc_grid_power[0]
-        base_data.from_grid_power = calc_grid_power[1]
-        base_data.charge_power = calc_charge_power[0]
-        base_data.discharge_power = calc_charge_power[1]
-        return base_data
+        return self._interpret_modbus_data(res)
 
     def get_raw_data_modbus(self) -> RawData:
         # get all known registers
@@ -138,22 +282,132 @@ class VartaStorage:
         if self.cgi_client is None:
             raise ValueError(CGI_ERR)
 
-        ems = self.cgi_client.get_ems_cgi()
+        ems = self.cgi_client.get_ems_rows_cgi()
 
         out = EmsData()
-        if "wr" in ems:
-            out.wr_data = WrData.from_dict(ems["wr"])
+        if self._is_single_row(ems, "wr"):
+            out.wr_data = WrData.from_row(*ems["wr"])
 
-        if "emeter" in ems:
-            out.emeter_data = EMeterData.from_dict(ems["emeter"])
+        if self._is_single_row(ems, "emeter"):
+            out.emeter_data = EMeterData.from_row(*ems["emeter"])
 
-        if "ens" in ems:
-            out.ens_data = EnsData.from_dict(ems["ens"])
+        if self._is_single_row(ems, "ens"):
+            out.ens_data = EnsData.from_row(*ems["ens"])
 
         # TODO: add more if necessary
 
         return out
 
+    def _get_all_data_modbus_partial(self) -> ModbusData:
+        last_good = self._last_good.get("modbus_data")
+        res, self._failed_fields = self.modbus_client.get_all_data_modbus_partial(
+            last_good[0] if last_good else None, self.retries
+        )
+
+        now = monotonic()
+        for name in asdict(res):
+            if name not in self._failed_fields:
+                self._field_timestamps[name] = now
+
+        return self._interpret_modbus_data(res)
+
+    def _interpret_modbus_data(self, res: RawData) -> ModbusData:
+        # fields which were never read in partial mode are None
+        calc_grid_power = (
+            (None, None)
+            if res.grid_power is None
+            else self._calculate_to_from_grid(res.grid_power)
+        )
+        calc_charge_power = (
+            (None, None)
+            if res.active_power is None
+            else self._calculate_charge_discharge(res.active_power)
+        )
+
+        base_data = ModbusData.from_modbus_data(res)
+        base_data.state_text = (
+            None if res.state is None else self._interpret_state(state=res.state)
+        )
+        base_data.to_grid_power = calc_grid_power[0]
+        base_data.from_grid_power = calc_grid_power[1]
+        base_data.charge_power = calc_charge_power[0]
+        base_data.discharge_power = calc_charge_power[1]
+        return base_data
+
+    def _read_source(
+        self, name: str, reader: Callable[[], Any]
+    ) -> tuple[Any, SourceTiming | None, SourceStatus]:
+        if not self.partial:
+            value, timing = self._read_timed(reader)
+            return (value, timing, SourceStatus())
+
+        # the partial modbus reader already retries every failing register on
+        # its own, retrying it as a whole would multiply the register reads
+        attempts = 1 if name == "modbus_data" else self.retries + 1
+        error: ValueError | None = None
+        for _ in range(attempts):
+            try:
+                value, timing = self._read_timed(reader)
+            except ValueError as e:
+                error = e
+                continue
+            self._last_good[name] = (value, timing)
+            return (value, timing, SourceStatus())
+
+        last_good = self._last_good.get(name)
+        if last_good is None:
+            if name == "modbus_data":
+                # there is nothing to build VartaStorageData from
+                raise ValueError(str(error)) from error
+            return (None, None, SourceStatus(error=str(error), age=None))
+
+        value, timing = last_good
+        age = monotonic() - timing.monotonic
+        return (value, timing, SourceStatus(error=str(error), age=age))
+
+    def _get_stale_sources(self, timings: dict[str, SourceTiming | None]) -> list[str]:
+        read = {name: timing for name, timing in timings.items() if timing is not None}
+        if self.max_skew is None or len(read) < 2:
+            return []
+
+        # the middles of the first and last source of a sequential read are at
+        # least the durations in between apart, at best the two slowest sources
+        # are read first and last
+        durations = sorted(timing.duration for timing in read.values())
+        min_skew = sum(durations) - (durations[-1] + durations[-2]) / 2
+        if min_skew > self.max_skew:
+            return []
+
+        newest = max(timing.monotonic for timing in read.values())
+        return [
+            name
+            for name, timing in read.items()
+            if newest - timing.monotonic > self.max_skew
+        ]
+
+    @staticmethod
+    def _get_skew(timings: dict[str, SourceTiming | None]) -> float:
+        values = [timing.monotonic for timing in timings.values() if timing is not None]
+        return max(values) - min(values) if values else 0.0
+
+    @staticmethod
+    def _read_timed(reader: Callable[[], Any]) -> tuple[Any, SourceTiming]:
+        started = monotonic()
+        wall_started = time()
+        value = reader()
+        duration = monotonic() - started
+        timing = SourceTiming(
+            monotonic=started + duration / 2,
+            timestamp=wall_started + duration / 2,
+            duration=duration,
+        )
+        return (value, timing)
+
+    @staticmethod
+    def _is_single_row(ems: dict[str, tuple[list[str], list]], name: str) -> bool:
+        # a single record has exactly one value per column
+        return name in ems and len(ems[name][0]) == len(ems[name][1])
+
     @staticmethod
     def _interpret_state(state: int) -> str:
         # "BUSY" (e.g. during startup) = 0/ "RUN" (ready to charge / discharge) = 1/